@@ -2,10 +2,19 @@ from pathlib import Path
 import yaml
 from typing import Dict, Any, List, Optional
 
+# Парсер на C (libyaml), если PyYAML собран с его поддержкой
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
+
 class ConfigLoader:
     def __init__(self, config_path: str = "config.yaml"):
         self.config_path = config_path
         self.config = self._load_config()
+        self._special_hosts_map: Dict[str, Dict[str, Any]] = {
+            special_host["host"]: special_host for special_host in self.get_special_hosts_config()
+        }
 
     def _load_config(self) -> Dict[str, Any]:
         """Загрузка конфигурации из файла"""
@@ -14,7 +23,7 @@ class ConfigLoader:
             return {}
         
         with open(config_file, encoding='utf-8') as f:
-            return yaml.safe_load(f) or {}
+            return yaml.load(f, Loader=SafeLoader) or {}
 
     def get_server_config(self) -> Dict[str, Any]:
         """Получение настроек сервера"""
@@ -22,7 +31,7 @@ class ConfigLoader:
             "host": "0.0.0.0",
             "port": 3128,
             "timeout": 20,
-            "buffer_size": 4096
+            "buffer_size": 65536
         })
 
     def get_logging_config(self) -> Dict[str, Any]:
@@ -67,13 +76,8 @@ class ConfigLoader:
 
     def is_special_host(self, host: str) -> bool:
         """Проверка, является ли хост специальным"""
-        special_hosts = self.get_special_hosts_config()
-        return any(special_host["host"] == host for special_host in special_hosts)
+        return host in self._special_hosts_map
 
     def get_special_host_config(self, host: str) -> Optional[Dict[str, Any]]:
         """Получение настроек для специального хоста"""
-        special_hosts = self.get_special_hosts_config()
-        for special_host in special_hosts:
-            if special_host["host"] == host:
-                return special_host
-        return None 
\ No newline at end of file
+        return self._special_hosts_map.get(host) 
\ No newline at end of file
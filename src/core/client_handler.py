@@ -1,22 +1,81 @@
 import asyncio
-import uuid
-import time
-from typing import Dict, Any, Optional
-from aiohttp import ClientSession, ClientTimeout
+import ipaddress
+import os
+import socket
+from typing import Dict, Any, List, Optional, AsyncIterator, Iterable, Tuple
 from ..config.config_loader import ConfigLoader
 from ..logutils.logger import ProxyLogger
 from ..security.access_control import AccessControl
 from ..utils.http_utils import HTTPUtils
+from ..utils.splice import splice_tunnel
+from .upstream_pool import UpstreamPool
 from urllib.parse import urlsplit
 
+# Заголовки, добавляемые к запросу, если клиент их не передал (для поддержки JavaScript-приложений)
+DEFAULT_HEADERS = {
+    "Accept": "*/*",
+    "Accept-Language": "en-US,en;q=0.9",
+    "Accept-Encoding": "gzip, deflate",
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+}
+
+# Размер буферов сокета для соединений HTTPS-туннеля с удаленными серверами
+TUNNEL_SOCKET_BUFFER = 1 << 20
+
 class ClientHandler:
-    def __init__(self, config_loader: ConfigLoader, logger: ProxyLogger, access_control: AccessControl):
+    def __init__(self, config_loader: ConfigLoader, logger: ProxyLogger, access_control: AccessControl,
+                 http_client: Optional[str] = None):
         self.config_loader = config_loader
         self.logger = logger
         self.access_control = access_control
         self.http_utils = HTTPUtils()
         self.limits = config_loader.get_limits_config()
         self.max_body_size = self.limits.get("max_body_size_kb", 1024) * 1024
+        self.server_config = config_loader.get_server_config()
+        self.timeout = self.server_config.get("timeout", 20)
+        self.buffer_size = self.server_config.get("buffer_size", 65536)
+        # Клиент для запросов к upstream: "raw" (по умолчанию, прямое asyncio-соединение), "aiohttp" или "httpx"
+        if http_client is None:
+            http_client = self.server_config.get("http_client", "raw")
+        self.http_client = http_client.lower()
+        self._session = None
+        self._client = None
+        self._pool = UpstreamPool()
+
+    async def startup(self) -> None:
+        """Создание общего HTTP-клиента для всех запросов к upstream"""
+        if self.http_client == "raw" or self._session is not None or self._client is not None:
+            return
+        if self.http_client == "httpx":
+            try:
+                import httpx
+            except ImportError:
+                self.logger.log_event('warning', '-', message="httpx is not installed, falling back to aiohttp")
+                self.http_client = "aiohttp"
+            else:
+                # Upstream-запросы идут по http://, а HTTP/2 httpx согласует только через TLS (ALPN),
+                # поэтому используется HTTP/1.1 с пулом keep-alive соединений
+                self._client = httpx.AsyncClient(
+                    timeout=self.timeout,
+                    limits=httpx.Limits(max_connections=1024, max_keepalive_connections=256)
+                )
+                return
+
+        from aiohttp import ClientSession, ClientTimeout, TCPConnector
+
+        timeout = ClientTimeout(total=self.timeout)
+        connector = TCPConnector(limit=0, limit_per_host=64, ttl_dns_cache=300, keepalive_timeout=60)
+        self._session = ClientSession(connector=connector, timeout=timeout, auto_decompress=False)
+
+    async def shutdown(self) -> None:
+        """Закрытие общего HTTP-клиента и пула соединений"""
+        self._pool.close()
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
 
     async def handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
         """
@@ -26,17 +85,18 @@ class ClientHandler:
             reader: StreamReader для чтения данных
             writer: StreamWriter для записи данных
         """
-        request_id = uuid.uuid4().hex[:8]
+        request_id = os.urandom(4).hex()
         peer = writer.get_extra_info("peername")
-        start_time = time.time()
+        start_time = asyncio.get_running_loop().time()
 
         self.logger.log_event('info', request_id, peer=peer)
 
         try:
             # Читаем заголовки запроса
             try:
-                data = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), timeout=5)
-            except asyncio.TimeoutError:
+                async with asyncio.timeout(5):
+                    data = await reader.readuntil(b"\r\n\r\n")
+            except TimeoutError:
                 self.logger.log_event('warning', request_id, message="Timeout reading headers")
                 writer.write(b"HTTP/1.1 408 Request Timeout\r\nContent-Length: 0\r\n\r\n")
                 await writer.drain()
@@ -48,13 +108,13 @@ class ClientHandler:
                 return
 
             # Парсим первую строку запроса
-            header_lines = data.decode(errors='ignore').split('\r\n')
+            header_lines = data.split(b"\r\n")
             if not header_lines:
                 return
 
             # Обработка HTTPS CONNECT
-            if header_lines[0].startswith("CONNECT"):
-                await self._handle_connect(reader, writer, header_lines[0], request_id, peer)
+            if header_lines[0].startswith(b"CONNECT"):
+                await self._handle_connect(reader, writer, header_lines[0].decode(errors='ignore'), request_id, peer)
                 return
 
             # Обработка обычного HTTP запроса
@@ -86,23 +146,47 @@ class ClientHandler:
 
         try:
             remote_reader, remote_writer = await asyncio.open_connection(host, port)
+            self._tune_tunnel_socket(remote_writer)
             writer.write(b"HTTP/1.1 200 Connection established\r\n\r\n")
             await writer.drain()
 
-            await asyncio.gather(
-                self._tunnel_data(reader, remote_writer),
-                self._tunnel_data(remote_reader, writer)
-            )
+            # На Linux передаем данные напрямую между сокетами, иначе через StreamReader/StreamWriter
+            if await splice_tunnel(reader, writer, remote_reader, remote_writer):
+                remote_writer.close()
+                return
+
+            # Встречное направление — в отдельной задаче, прямое — в текущей
+            reverse = asyncio.create_task(self._tunnel_data(remote_reader, writer))
+            try:
+                await self._tunnel_data(reader, remote_writer)
+                await reverse
+            finally:
+                reverse.cancel()
         except Exception as e:
             self.logger.log_event('error', request_id, message=f"[HTTPS] CONNECT failed: {e}")
             writer.write(b"HTTP/1.1 502 Bad Gateway\r\n\r\n")
             await writer.drain()
 
+    @staticmethod
+    def _tune_tunnel_socket(writer: asyncio.StreamWriter) -> None:
+        """Увеличение буферов сокета туннеля (кроме loopback, где это только добавляет задержку)"""
+        sock = writer.get_extra_info("socket")
+        peername = writer.get_extra_info("peername")
+        if sock is None or not peername:
+            return
+        try:
+            if ipaddress.ip_address(peername[0]).is_loopback:
+                return
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, TUNNEL_SOCKET_BUFFER)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, TUNNEL_SOCKET_BUFFER)
+        except (ValueError, OSError):
+            pass
+
     async def _handle_http_request(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
-                                 header_lines: list, request_id: str, peer: tuple, start_time: float) -> None:
+                                 header_lines: List[bytes], request_id: str, peer: tuple, start_time: float) -> None:
         """Обработка обычного HTTP запроса"""
         try:
-            method, url, version = self.http_utils.parse_request_line(header_lines[0])
+            method, url, version = self.http_utils.parse_request_line(header_lines[0].decode(errors='ignore'))
         except ValueError as e:
             self.logger.log_event('error', request_id, message=str(e))
             writer.write(b"HTTP/1.1 400 Bad Request\r\n\r\n")
@@ -110,10 +194,16 @@ class ClientHandler:
             return
 
         # Парсим заголовки
-        headers = self.http_utils.parse_headers('\r\n'.join(header_lines[1:-2]))
+        headers = self.http_utils.parse_headers(header_lines[1:])
 
         # Парсим URL
         host, port, path, query = self.http_utils.parse_url(url)
+        if host is None:
+            # Прокси принимает только абсолютный URL, иначе хост пришлось бы брать из запроса клиента
+            self.logger.log_event('warning', request_id, message=f"No host in request URL: {url}")
+            writer.write(b"HTTP/1.1 400 Bad Request\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+            await writer.drain()
+            return
 
         # Проверяем доступ
         client_ip = peer[0]
@@ -139,109 +229,262 @@ class ClientHandler:
                 self.logger.log_event('warning', request_id, message=f"Failed to read body: {e}")
 
         # Логируем детали запроса
-        if self.logger.log_fields.get("body"):
+        if self.logger.log_body:
             self.logger.log_event('info', request_id, body=content.decode(errors='ignore'))
-        if self.logger.log_fields.get("headers"):
+        if self.logger.log_headers:
             self.logger.log_event('info', request_id, headers=headers)
 
-        # Специальная обработка для IP 172.16.10.30
-        if host == "172.16.10.30":
-            await self._handle_special_host(reader, writer, method, url, headers, content, host, port)
+        # Специальная обработка для хостов из special_hosts
+        if self.config_loader.is_special_host(host):
+            await self._handle_special_host(reader, writer, method, url, headers, content, host, port,
+                                            request_id, start_time)
             return
 
         # Логируем время выполнения
-        if self.logger.log_fields.get("duration_ms"):
-            duration = round((time.time() - start_time) * 1000)
+        if self.logger.log_duration:
+            duration = round((asyncio.get_running_loop().time() - start_time) * 1000)
             self.logger.log_event('info', request_id, duration=duration)
 
-        # Обычная обработка через aiohttp
-        url = f"http://{host}{path}"
+        # Обычная обработка через HTTP-клиент, порт берем из заголовка Host
+        host_port = self.http_utils.extract_port(headers.get("Host", ""))
+        url = f"http://{host}{path}" if host_port is None else f"http://{host}:{host_port}{path}"
         if query:
             url += f"?{query}"
 
-        # Проверяем порт в заголовке Host
-        host_header = headers.get("Host", "")
-        if ":" in host_header:
-            host_name, host_port = host_header.split(":", 1)
-            try:
-                port = int(host_port)
-                # Обновляем URL с правильным портом
-                url = f"http://{host}:{port}{path}"
-                if query:
-                    url += f"?{query}"
-            except ValueError:
-                pass  # Игнорируем некорректный порт
-
-        # Устанавливаем заголовки для поддержки JavaScript
-        headers["Connection"] = "close"
-        
         # Добавляем заголовки для поддержки JavaScript-приложений
-        if "Accept" not in headers:
-            headers["Accept"] = "*/*"
-        if "Accept-Language" not in headers:
-            headers["Accept-Language"] = "en-US,en;q=0.9"
-        if "Accept-Encoding" not in headers:
-            headers["Accept-Encoding"] = "gzip, deflate"
-        if "User-Agent" not in headers:
-            headers["User-Agent"] = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-        
-        # Получаем настройки таймаута из конфигурации
-        server_config = self.config_loader.get_server_config()
-        timeout = ClientTimeout(total=server_config.get("timeout", 20))
+        headers = {**DEFAULT_HEADERS, **headers}
 
-        try:
-            async with ClientSession(timeout=timeout) as session:
-                async with session.request(method, url, headers=headers, data=content) as resp:
-                    body = await resp.read()
-                    writer.write(f"HTTP/1.1 {resp.status} {resp.reason}\r\n".encode())
-                    for k, v in resp.headers.items():
-                        writer.write(f"{k}: {v}\r\n".encode())
-                    writer.write(b"Connection: close\r\n\r\n")
-                    writer.write(body)
-                    await writer.drain()
+        if self.http_client != "raw" and self._session is None and self._client is None:
+            await self.startup()
 
-                    # Логируем ответ
-                    if self.logger.log_fields.get("response_headers"):
-                        self.logger.log_event('info', request_id, response_headers=dict(resp.headers))
-                    if self.logger.log_fields.get("response_body"):
-                        self.logger.log_event('info', request_id, response_body=body.decode(errors='ignore'))
+        try:
+            if self.http_client == "raw":
+                target = f"{path}?{query}" if query else path
+                await self._forward_http(writer, request_id, method, host, host_port or port, target,
+                                         headers, content)
+            elif self._client is not None:
+                async with self._client.stream(method, url, headers=headers, content=content) as resp:
+                    await self._relay_response(writer, request_id, resp.status_code, resp.reason_phrase,
+                                               resp.headers.multi_items(), resp.aiter_raw(65536))
+            else:
+                async with self._session.request(method, url, headers=headers, data=content) as resp:
+                    await self._relay_response(writer, request_id, resp.status, resp.reason,
+                                               resp.headers.items(), resp.content.iter_chunked(65536))
 
         except Exception as e:
-            self.logger.log_event('error', request_id, message=f"[AIOHTTP ERROR] {e}")
+            self.logger.log_event('error', request_id, message=f"[UPSTREAM ERROR] {e}")
             writer.write(b"HTTP/1.1 502 Bad Gateway\r\n\r\n")
             await writer.drain()
 
+    async def _forward_http(self, writer: asyncio.StreamWriter, request_id: str, method: str, host: str,
+                            port: int, target: str, headers: Dict[str, str], content: bytes) -> None:
+        """Передача запроса upstream напрямую через asyncio-соединение и потоковая передача ответа"""
+        # Hop-by-hop заголовки клиента не передаются, соединение с upstream остается keep-alive
+        request = [f"{method} {target} HTTP/1.1\r\n".encode()]
+        request.extend(
+            f"{k}: {v}\r\n".encode() for k, v in headers.items()
+            if k.lower() not in ("connection", "proxy-connection", "keep-alive", "upgrade")
+        )
+        if not any(k.lower() == "host" for k in headers):
+            request.append(f"Host: {host}:{port}\r\n".encode())
+        request.append(b"\r\n")
+        if content:
+            request.append(content)
+
+        connection = self._pool.acquire(host, port)
+        reused = connection is not None
+        while True:
+            if connection is None:
+                async with asyncio.timeout(self.timeout):
+                    connection = await asyncio.open_connection(host, port)
+            remote_reader, remote_writer = connection
+            try:
+                remote_writer.writelines(request)
+                await remote_writer.drain()
+                async with asyncio.timeout(self.timeout):
+                    head = await remote_reader.readuntil(b"\r\n\r\n")
+                break
+            except BaseException as e:
+                remote_writer.close()
+                # Соединение из пула могло быть закрыто сервером — повторяем запрос на новом
+                stale = isinstance(e, ConnectionError) or (
+                    isinstance(e, asyncio.IncompleteReadError) and not e.partial
+                )
+                if not reused or not stale:
+                    raise
+                connection, reused = None, False
+
+        keep_alive = False
+        head_sent = False
+        try:
+            version, status, response_headers = self._parse_response_head(head)
+            # Промежуточные ответы 1xx передаем клиенту и читаем следующий
+            while 100 <= status < 200:
+                # Смена протокола не запрашивается (Connection и Upgrade клиента не передаются),
+                # и двунаправленной передачи после 101 нет — такой ответ считаем ошибкой upstream
+                if status == 101:
+                    raise ValueError("Unexpected 101 Switching Protocols from upstream")
+                writer.write(head)
+                head_sent = True
+                async with asyncio.timeout(self.timeout):
+                    head = await remote_reader.readuntil(b"\r\n\r\n")
+                version, status, response_headers = self._parse_response_head(head)
+            # Соединение с клиентом закрывается после ответа, о чем ему и сообщаем
+            writer.write(self.http_utils.force_close_head(head))
+            head_sent = True
+
+            # Потоково передаем тело, накапливая его только для логирования
+            response_body = bytearray() if self.logger.log_response_body else None
+            keep_alive = await self._relay_body(remote_reader, writer, method, version, status,
+                                                response_headers, response_body)
+            await writer.drain()
+
+            # Логируем ответ
+            if self.logger.log_response_headers:
+                self.logger.log_event('info', request_id, response_headers=response_headers)
+            if response_body is not None:
+                self.logger.log_event('info', request_id, response_body=response_body.decode(errors='ignore'))
+        except Exception as e:
+            if not head_sent:
+                raise
+            self._abort_response(writer, request_id, e)
+        finally:
+            if keep_alive:
+                self._pool.release(host, port, remote_reader, remote_writer)
+            else:
+                remote_writer.close()
+
+    def _parse_response_head(self, head: bytes) -> Tuple[str, int, Dict[str, str]]:
+        """Разбор строки статуса и заголовков ответа upstream"""
+        lines = head.split(b"\r\n")
+        parts = lines[0].split(None, 2)
+        if len(parts) < 2:
+            raise ValueError(f"Invalid status line: {lines[0]!r}")
+        return parts[0].decode(errors='ignore'), int(parts[1]), self.http_utils.parse_headers(lines[1:])
+
+    async def _relay_body(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, method: str,
+                          version: str, status: int, headers: Dict[str, str],
+                          response_body: Optional[bytearray]) -> bool:
+        """
+        Передача тела ответа upstream клиенту с учетом его границ
+
+        Returns:
+            bool: True если соединение с upstream можно вернуть в пул
+        """
+        lower = {k.lower(): v.lower() for k, v in headers.items()}
+        reusable = version == "HTTP/1.1" and "close" not in lower.get("connection", "")
+
+        if method == "HEAD" or status in (204, 304):
+            return reusable
+        if "chunked" in lower.get("transfer-encoding", ""):
+            await self._copy_chunked(reader, writer, response_body)
+            return reusable
+        if "content-length" in lower:
+            await self._copy_exact(reader, writer, int(lower["content-length"]), response_body)
+            return reusable
+
+        # Без указания длины тело заканчивается закрытием соединения
+        await self._copy_until_eof(reader, writer, response_body)
+        return False
+
+    async def _copy_exact(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, size: int,
+                          response_body: Optional[bytearray]) -> None:
+        """Передача ровно size байт"""
+        while size > 0:
+            chunk = await reader.read(min(size, self.buffer_size))
+            if not chunk:
+                raise asyncio.IncompleteReadError(b"", size)
+            size -= len(chunk)
+            writer.write(chunk)
+            if response_body is not None:
+                response_body.extend(chunk)
+            await writer.drain()
+
+    async def _copy_chunked(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+                            response_body: Optional[bytearray]) -> None:
+        """Передача тела в chunked-кодировке без изменений"""
+        while True:
+            line = await reader.readuntil(b"\r\n")
+            writer.write(line)
+            size = int(line.split(b";", 1)[0].strip(), 16)
+            if size == 0:
+                # Трейлеры до пустой строки
+                while line != b"\r\n":
+                    line = await reader.readuntil(b"\r\n")
+                    writer.write(line)
+                return
+            await self._copy_exact(reader, writer, size, response_body)
+            writer.write(await reader.readexactly(2))
+
+    async def _copy_until_eof(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+                              response_body: Optional[bytearray]) -> None:
+        """Передача данных до закрытия соединения"""
+        while True:
+            chunk = await reader.read(self.buffer_size)
+            if not chunk:
+                break
+            writer.write(chunk)
+            if response_body is not None:
+                response_body.extend(chunk)
+            await writer.drain()
+
+    def _abort_response(self, writer: asyncio.StreamWriter, request_id: str, error: Exception) -> None:
+        """Обрыв ответа, заголовки которого уже отправлены клиенту: 502 дописать нельзя, закрываем соединение"""
+        self.logger.log_event('error', request_id, message=f"[UPSTREAM ERROR] response interrupted: {error}")
+        writer.close()
+
+    async def _relay_response(self, writer: asyncio.StreamWriter, request_id: str, status: int, reason: str,
+                              headers: Iterable[Tuple[str, str]], chunks: AsyncIterator[bytes]) -> None:
+        """Передача ответа upstream клиенту"""
+        headers = list(headers)
+        # Тело передается как есть до закрытия соединения, поэтому
+        # hop-by-hop заголовки upstream клиенту не пересылаем.
+        # Строка статуса и все заголовки отправляются одной записью в транспорт
+        head = self.http_utils.format_response_head(
+            status, reason, ((k, v) for k, v in headers if k.lower() not in ("connection", "transfer-encoding"))
+        )
+        head += b"Connection: close\r\n\r\n"
+        writer.write(bytes(head))
+
+        # Потоково передаем тело, накапливая его только для логирования
+        response_body = bytearray() if self.logger.log_response_body else None
+        try:
+            async for chunk in chunks:
+                writer.write(chunk)
+                if response_body is not None:
+                    response_body.extend(chunk)
+                await writer.drain()
+        except Exception as e:
+            self._abort_response(writer, request_id, e)
+            return
+
+        # Логируем ответ
+        if self.logger.log_response_headers:
+            self.logger.log_event('info', request_id, response_headers=dict(headers))
+        if response_body is not None:
+            self.logger.log_event('info', request_id, response_body=response_body.decode(errors='ignore'))
+
     async def _handle_special_host(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
                                  method: str, url: str, headers: Dict[str, str], content: bytes,
-                                 host: str, port: int) -> None:
-        """Специальная обработка для хоста 172.16.10.30"""
-        request_id = uuid.uuid4().hex[:8]
-        start_time = time.time()
-        
+                                 host: str, port: int, request_id: str, start_time: float) -> None:
+        """Специальная обработка для хостов из special_hosts"""
         # Проверяем порт в заголовке Host
-        host_header = headers.get("Host", "")
-        if ":" in host_header:
-            host_name, host_port = host_header.split(":", 1)
-            try:
-                port = int(host_port)
-            except ValueError:
-                pass  # Игнорируем некорректный порт
-        
+        host_port = self.http_utils.extract_port(headers.get("Host", ""))
+        if host_port is not None:
+            port = host_port
+
         self.logger.log_event('info', request_id, method=method, url=url)
         
-        if self.logger.log_fields.get("headers"):
+        if self.logger.log_headers:
             self.logger.log_event('info', request_id, headers=headers)
             
-        if self.logger.log_fields.get("body") and content:
+        if self.logger.log_body and content:
             self.logger.log_event('info', request_id, body=content.decode(errors='ignore'))
             
+        response_started = False
         try:
             remote_reader, remote_writer = await asyncio.open_connection(host, port)
 
-            # Получаем размер буфера из конфигурации
-            server_config = self.config_loader.get_server_config()
-            buffer_size = server_config.get("buffer_size", 4096)
-
             # Формируем запрос с принудительным закрытием соединения
             request_lines = [
                 f"{method} {url} HTTP/1.1",
@@ -259,30 +502,34 @@ class ClientHandler:
             await remote_writer.drain()
 
             # Читаем и передаем ответ
-            response_body = b""
+            response_body = bytearray() if self.logger.log_response_body else None
             while not remote_reader.at_eof():
-                chunk = await remote_reader.read(buffer_size)
+                chunk = await remote_reader.read(self.buffer_size)
                 if not chunk:
                     break
-                response_body += chunk
+                if response_body is not None:
+                    response_body.extend(chunk)
                 writer.write(chunk)
+                response_started = True
                 await writer.drain()
                 
             # Логируем ответ
-            if self.logger.log_fields.get("response_body") and response_body:
+            if response_body:
                 self.logger.log_event('info', request_id, response_body=response_body.decode(errors='ignore'))
                 
             # Логируем время выполнения
-            if self.logger.log_fields.get("duration_ms"):
-                duration = round((time.time() - start_time) * 1000)
+            if self.logger.log_duration:
+                duration = round((asyncio.get_running_loop().time() - start_time) * 1000)
                 self.logger.log_event('info', request_id, duration=duration)
 
             remote_writer.close()
             await remote_writer.wait_closed()
         except Exception as e:
             self.logger.log_event('error', request_id, message=f"[SPECIAL HOST ERROR] {e}")
-            writer.write(b"HTTP/1.1 502 Bad Gateway\r\n\r\n")
-            await writer.drain()
+            # Если часть ответа уже передана, 502 только испортил бы его
+            if not response_started:
+                writer.write(b"HTTP/1.1 502 Bad Gateway\r\n\r\n")
+                await writer.drain()
         finally:
             writer.close()
             await writer.wait_closed()
@@ -291,11 +538,14 @@ class ClientHandler:
         """Туннелирование данных между клиентом и сервером"""
         try:
             while not reader.at_eof():
-                chunk = await reader.read(4096)
+                chunk = await reader.read(65536)
                 if not chunk:
                     break
                 writer.write(chunk)
-                await writer.drain()
+                # Уступаем циклу событий только когда буфер транспорта выше верхней границы
+                transport = writer.transport
+                if transport.get_write_buffer_size() > transport.get_write_buffer_limits()[1]:
+                    await writer.drain()
         except Exception:
             pass
         finally:
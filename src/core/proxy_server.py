@@ -1,5 +1,6 @@
 import asyncio
 import logging
+import sys
 from ..config.config_loader import ConfigLoader
 from ..logutils.logger import ProxyLogger
 from ..security.access_control import AccessControl
@@ -18,6 +19,8 @@ class ProxyServer:
         host = self.server_config.get("host", "0.0.0.0")
         port = self.server_config.get("port", 3128)
 
+        await self.client_handler.startup()
+
         server = await asyncio.start_server(
             self.client_handler.handle_client,
             host,
@@ -26,12 +29,30 @@ class ProxyServer:
 
         logging.info(f"🚀 Proxy server listening on {host}:{port}")
 
-        async with server:
-            await server.serve_forever()
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            await self.client_handler.shutdown()
+
+    @staticmethod
+    def _install_event_loop() -> None:
+        """Установка uvloop (winloop на Windows) если библиотека доступна"""
+        try:
+            if sys.platform == "win32":
+                import winloop as loop_impl
+            else:
+                import uvloop as loop_impl
+        except ImportError:
+            return
+        loop_impl.install()
 
     def run(self):
         """Запуск сервера в основном потоке"""
+        self._install_event_loop()
         try:
             asyncio.run(self.start())
         except KeyboardInterrupt:
-            logging.info("🛑 Proxy server stopped") 
\ No newline at end of file
+            logging.info("🛑 Proxy server stopped")
+        finally:
+            self.logger.close() 
\ No newline at end of file
@@ -0,0 +1,108 @@
+import asyncio
+import time
+from typing import Dict, List, Optional, Tuple
+
+from ..utils.streams import buffered_size
+
+Connection = Tuple[asyncio.StreamReader, asyncio.StreamWriter]
+
+class UpstreamPool:
+    """Пул keep-alive соединений с upstream-серверами, по одному стеку на (хост, порт)"""
+
+    def __init__(self, max_idle_per_host: int = 16, max_idle_total: int = 256, idle_timeout: float = 30):
+        self.max_idle_per_host = max_idle_per_host
+        self.max_idle_total = max_idle_total
+        self.idle_timeout = idle_timeout
+        # (хост, порт) -> [(reader, writer, время возврата в пул)], от старых к новым;
+        # пустые стеки удаляются, чтобы словарь не рос с каждым новым upstream
+        self._idle: Dict[Tuple[str, int], List[Tuple[asyncio.StreamReader, asyncio.StreamWriter, float]]] = {}
+        self._idle_total = 0
+
+    @staticmethod
+    def _usable(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> bool:
+        """
+        Соединение можно использовать повторно: не закрыто сервером, не закрывается
+        и не содержит непрочитанных данных, которые исказили бы следующий ответ
+        """
+        return not reader.at_eof() and not writer.is_closing() and buffered_size(reader) == 0
+
+    def _sweep(self, now: float) -> None:
+        """Закрытие просроченных и закрытых сервером соединений во всех стеках"""
+        for key in list(self._idle):
+            stack = self._idle[key]
+            alive = []
+            for reader, writer, released_at in stack:
+                if now - released_at < self.idle_timeout and self._usable(reader, writer):
+                    alive.append((reader, writer, released_at))
+                else:
+                    writer.close()
+            self._idle_total -= len(stack) - len(alive)
+            if alive:
+                self._idle[key] = alive
+            else:
+                del self._idle[key]
+
+    def _evict_oldest(self) -> None:
+        """Закрытие самого давно возвращенного соединения во всем пуле"""
+        key = min(self._idle, key=lambda k: self._idle[k][0][2])
+        stack = self._idle[key]
+        stack.pop(0)[1].close()
+        self._idle_total -= 1
+        if not stack:
+            del self._idle[key]
+
+    def acquire(self, host: str, port: int) -> Optional[Connection]:
+        """
+        Получение свободного соединения из пула
+
+        Args:
+            host: Хост upstream
+            port: Порт upstream
+
+        Returns:
+            Optional[Connection]: Пара (reader, writer) или None, если живых соединений нет
+        """
+        key = (host, port)
+        stack = self._idle.get(key)
+        if not stack:
+            return None
+        now = time.monotonic()
+        result: Optional[Connection] = None
+        while stack:
+            reader, writer, released_at = stack.pop()
+            self._idle_total -= 1
+            if now - released_at < self.idle_timeout and self._usable(reader, writer):
+                result = (reader, writer)
+                break
+            writer.close()
+        if not stack:
+            del self._idle[key]
+        return result
+
+    def release(self, host: str, port: int, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Возврат соединения в пул после полностью прочитанного ответа"""
+        if not self._usable(reader, writer) or self.max_idle_per_host <= 0 or self.max_idle_total <= 0:
+            writer.close()
+            return
+
+        # Сначала освобождаем место от просроченных соединений, затем вытесняем самые старые
+        now = time.monotonic()
+        self._sweep(now)
+        key = (host, port)
+        stack = self._idle.get(key)
+        if stack is not None and len(stack) >= self.max_idle_per_host:
+            stack.pop(0)[1].close()
+            self._idle_total -= 1
+        while self._idle_total >= self.max_idle_total:
+            self._evict_oldest()
+
+        self._idle.setdefault(key, []).append((reader, writer, now))
+        self._idle_total += 1
+
+    def close(self) -> None:
+        """Закрытие всех свободных соединений"""
+        for stack in self._idle.values():
+            for _, writer, _ in stack:
+                writer.close()
+        self._idle.clear()
+        self._idle_total = 0
@@ -1,13 +1,33 @@
 import logging
-from logging.handlers import RotatingFileHandler
+import queue
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
 from typing import Dict, Any, Optional
 from ..config.config_loader import ConfigLoader
 
+# Соответствие уровней log_event уровням модуля logging
+LOG_LEVELS: Dict[str, int] = {
+    "info": logging.INFO,
+    "warning": logging.WARNING,
+    "error": logging.ERROR,
+    "debug": logging.DEBUG
+}
+
 class ProxyLogger:
     def __init__(self, config_loader: ConfigLoader):
         self.config_loader = config_loader
         self.log_fields = config_loader.get_log_fields()
+        # Флаги полей логирования, чтобы не искать их в словаре на каждое событие
+        self.log_remote_ip = bool(self.log_fields.get("remote_ip"))
+        self.log_method = bool(self.log_fields.get("method"))
+        self.log_url = bool(self.log_fields.get("url"))
+        self.log_status_code = bool(self.log_fields.get("status_code"))
+        self.log_duration = bool(self.log_fields.get("duration_ms"))
+        self.log_headers = bool(self.log_fields.get("headers"))
+        self.log_body = bool(self.log_fields.get("body"))
+        self.log_response_headers = bool(self.log_fields.get("response_headers"))
+        self.log_response_body = bool(self.log_fields.get("response_body"))
+        self._listener: Optional[QueueListener] = None
         self.setup_logging()
 
     def setup_logging(self) -> None:
@@ -34,13 +54,28 @@ class ProxyLogger:
         formatter = logging.Formatter('%(asctime)s [%(levelname)s] %(message)s')
         handler.setFormatter(formatter)
 
+        # Запись в файл выполняется в отдельном потоке, чтобы не блокировать цикл событий
+        log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+        self._listener = QueueListener(log_queue, handler)
+        self._listener.start()
+
+        # Итоговое форматирование выполняет файловый обработчик
+        queue_handler = QueueHandler(log_queue)
+        queue_handler.setFormatter(logging.Formatter('%(message)s'))
+
         # Настройка корневого логгера
         logging.basicConfig(
             level=getattr(logging, log_level),
-            handlers=[handler]
+            handlers=[queue_handler]
         )
 
-    def log_event(self, level: str, request_id: str, **kwargs) -> None:
+    def close(self) -> None:
+        """Остановка фонового потока логирования с записью оставшихся сообщений"""
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
+
+    def log_event(self, level: str, request_id: str, **kwargs: Any) -> None:
         """
         Логирование события с учетом настроек полей логирования
         
@@ -49,38 +84,34 @@ class ProxyLogger:
             request_id: Уникальный идентификатор запроса
             **kwargs: Дополнительные поля для логирования
         """
+        numeric_level = LOG_LEVELS.get(level.lower(), logging.INFO)
+        logger = logging.getLogger()
+        # Не формируем сообщение, если оно все равно будет отброшено
+        if not logger.isEnabledFor(numeric_level):
+            return
+
         pieces = []
 
         # Формируем сообщение на основе настроенных полей
-        if self.log_fields.get("remote_ip") and kwargs.get("peer"):
+        if self.log_remote_ip and kwargs.get("peer"):
             pieces.append(f"IP={kwargs['peer']}")
-        if self.log_fields.get("method") and kwargs.get("method"):
+        if self.log_method and kwargs.get("method"):
             pieces.append(f"METHOD={kwargs['method']}")
-        if self.log_fields.get("url") and kwargs.get("url"):
+        if self.log_url and kwargs.get("url"):
             pieces.append(f"URL={kwargs['url']}")
-        if self.log_fields.get("status_code") and kwargs.get("status_code") is not None:
+        if self.log_status_code and kwargs.get("status_code") is not None:
             pieces.append(f"STATUS={kwargs['status_code']}")
-        if self.log_fields.get("duration_ms") and kwargs.get("duration") is not None:
+        if self.log_duration and kwargs.get("duration") is not None:
             pieces.append(f"TIME={kwargs['duration']}ms")
-        if self.log_fields.get("headers") and kwargs.get("headers"):
+        if self.log_headers and kwargs.get("headers"):
             pieces.append(f"HEADERS={kwargs['headers']}")
-        if self.log_fields.get("body") and kwargs.get("body") is not None:
+        if self.log_body and kwargs.get("body") is not None:
             pieces.append(f"BODY={kwargs['body']}")
-        if self.log_fields.get("response_headers") and kwargs.get("response_headers"):
+        if self.log_response_headers and kwargs.get("response_headers"):
             pieces.append(f"RESP_HEADERS={kwargs['response_headers']}")
-        if self.log_fields.get("response_body") and kwargs.get("response_body") is not None:
+        if self.log_response_body and kwargs.get("response_body") is not None:
             pieces.append(f"RESP_BODY={kwargs['response_body']}")
         if kwargs.get("message"):
             pieces.append(str(kwargs["message"]))
 
-        msg = f"[{request_id}] " + " | ".join(pieces)
-
-        # Выбираем функцию логирования в зависимости от уровня
-        log_func = {
-            "info": logging.info,
-            "warning": logging.warning,
-            "error": logging.error,
-            "debug": logging.debug
-        }.get(level.lower(), logging.info)
-
-        log_func(msg) 
\ No newline at end of file
+        logger.log(numeric_level, "[%s] %s", request_id, " | ".join(pieces)) 
\ No newline at end of file
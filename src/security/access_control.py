@@ -1,14 +1,123 @@
 import ipaddress
 import fnmatch
+import os
+import re
+import time
+from functools import lru_cache
 from pathlib import Path
-from typing import Set, Dict, Any
+from typing import Set, Dict, Any, List, Tuple, Union, FrozenSet, Optional, Pattern
 from ..config.config_loader import ConfigLoader
 
+IPNetwork = Union[ipaddress.IPv4Network, ipaddress.IPv6Network]
+
+# Начиная с этого количества сетей поиск правила идет по таблицам префиксов
+PREFIX_TABLE_THRESHOLD = 100
+
+@lru_cache(maxsize=64)
+def compile_patterns(patterns: FrozenSet[str]) -> Pattern:
+    """
+    Сборка набора шаблонов в одно регулярное выражение
+    
+    Args:
+        patterns: Множество шаблонов в формате fnmatch
+        
+    Returns:
+        Pattern: Скомпилированное выражение, совпадающее хотя бы с одним шаблоном
+    """
+    alternatives = []
+    for pattern in sorted(patterns):
+        alternatives.append(fnmatch.translate(os.path.normcase(pattern)))
+        # Дополнительно: если паттерн начинается с *, и hostname == остатку — засчитываем
+        if pattern.startswith("*"):
+            alternatives.append(re.escape(os.path.normcase(pattern.lstrip("*"))) + r"\Z")
+    if not alternatives:
+        return re.compile(r"(?!)")
+    return re.compile("|".join(f"(?:{alt})" for alt in alternatives))
+
 class AccessControl:
     def __init__(self, config_loader: ConfigLoader):
         self.config_loader = config_loader
         self.access_config = config_loader.get_access_control_config()
         self.default_action = self.access_config.get("default_action", "deny").lower()
+        # Путь к файлу -> (mtime на момент загрузки, множество доменов)
+        self._domain_cache: Dict[str, Tuple[Optional[float], Set[str]]] = {}
+        # Как часто (в секундах) проверять изменение файлов списков, 0 — не проверять
+        self.cache_ttl = self.access_config.get("cache_ttl", 300)
+        self._checked_at = time.monotonic()
+        self._compile_rules()
+
+    def _compile_rules(self) -> None:
+        """Предварительный разбор правил: сети, действия и списки доменов"""
+        # (действие, белый список, черный список) в порядке следования правил;
+        # списки хранятся в виде скомпилированных выражений, None — список пуст
+        self._rules: List[Tuple[str, Optional[Pattern], Optional[Pattern]]] = []
+        # (сеть, индекс правила) в порядке следования правил
+        self._networks: List[Tuple[IPNetwork, int]] = []
+
+        for rule in self.access_config.get("rules", []):
+            action = rule.get("action", "deny").lower()
+            if action not in ("allow", "deny"):
+                continue
+
+            whitelist = self.load_domain_list(rule["whitelist_file"]) if "whitelist_file" in rule else set()
+            blacklist = self.load_domain_list(rule["blacklist_file"]) if "blacklist_file" in rule else set()
+            index = len(self._rules)
+            self._rules.append((
+                action,
+                compile_patterns(frozenset(whitelist)) if whitelist else None,
+                compile_patterns(frozenset(blacklist)) if blacklist else None
+            ))
+
+            for net in rule.get("networks", []):
+                try:
+                    self._networks.append((ipaddress.ip_network(net), index))
+                except ValueError:
+                    continue
+
+        # Для больших наборов сетей: версия IP -> длина префикса -> адрес сети -> индекс правила.
+        # Поиск проверяет не более 33/129 префиксов вместо перебора всех сетей
+        self._prefix_tables: Dict[int, Dict[int, Dict[int, int]]] = {}
+        if len(self._networks) > PREFIX_TABLE_THRESHOLD:
+            for network, index in self._networks:
+                table = self._prefix_tables.setdefault(network.version, {}).setdefault(network.prefixlen, {})
+                key = int(network.network_address)
+                # При пересечении побеждает правило, указанное раньше
+                if key not in table or index < table[key]:
+                    table[key] = index
+
+    @staticmethod
+    def _file_mtime(file_path: str) -> Optional[float]:
+        """Время изменения файла, None если файла нет"""
+        try:
+            return os.stat(file_path).st_mtime
+        except OSError:
+            return None
+
+    def _refresh_domain_lists(self) -> None:
+        """Пересборка правил, если какой-либо файл списков изменился"""
+        self._checked_at = time.monotonic()
+        for file_path, (mtime, _) in self._domain_cache.items():
+            if self._file_mtime(file_path) != mtime:
+                self._compile_rules()
+                return
+
+    def _find_rule(self, ip: Union[ipaddress.IPv4Address, ipaddress.IPv6Address]) -> int:
+        """Поиск индекса первого подходящего правила, -1 если правило не найдено"""
+        if not self._prefix_tables:
+            for network, index in self._networks:
+                if ip in network:
+                    return index
+            return -1
+
+        found = -1
+        ip_int = int(ip)
+        max_len = ip.max_prefixlen
+        for prefixlen, table in self._prefix_tables.get(ip.version, {}).items():
+            mask = ((1 << prefixlen) - 1) << (max_len - prefixlen)
+            index = table.get(ip_int & mask, -1)
+            if index != -1 and (found == -1 or index < found):
+                found = index
+        return found
 
     def load_domain_list(self, file_path: str) -> Set[str]:
         """
@@ -20,15 +129,23 @@ class AccessControl:
         Returns:
             Set[str]: Множество доменов
         """
+        # Повторно читаем файл только если он изменился с момента загрузки
+        mtime = self._file_mtime(file_path)
+        cached = self._domain_cache.get(file_path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+
         try:
             with open(file_path, encoding='utf-8') as f:
-                return set(
+                domains = set(
                     line.split("#", 1)[0].strip()
                     for line in f
                     if line.strip() and not line.strip().startswith("#")
                 )
         except FileNotFoundError:
-            return set()
+            domains = set()
+        self._domain_cache[file_path] = (mtime, domains)
+        return domains
 
     def match_hostname(self, hostname: str, pattern_set: Set[str]) -> bool:
         """
@@ -41,13 +158,7 @@ class AccessControl:
         Returns:
             bool: True если хост соответствует хотя бы одному шаблону
         """
-        for pattern in pattern_set:
-            if fnmatch.fnmatch(hostname, pattern):
-                return True
-            # Дополнительно: если паттерн начинается с *, и hostname == остатку — засчитываем
-            if pattern.startswith("*") and hostname == pattern.lstrip("*"):
-                return True
-        return False
+        return compile_patterns(frozenset(pattern_set)).match(os.path.normcase(hostname)) is not None
 
     def check_access(self, client_ip: str, hostname: str) -> bool:
         """
@@ -60,31 +171,22 @@ class AccessControl:
         Returns:
             bool: True если доступ разрешен
         """
-        ip = ipaddress.ip_address(client_ip)
-        
-        for rule in self.access_config.get("rules", []):
-            networks = rule.get("networks", [])
-            for net in networks:
-                try:
-                    if ip in ipaddress.ip_network(net):
-                        action = rule.get("action", "deny").lower()
-                        
-                        # Загружаем списки доменов если они указаны
-                        whitelist = self.load_domain_list(rule.get("whitelist_file", "")) if "whitelist_file" in rule else set()
-                        blacklist = self.load_domain_list(rule.get("blacklist_file", "")) if "blacklist_file" in rule else set()
-
-                        if action == "deny":
-                            # Для deny: разрешаем только если домен в белом списке
-                            if whitelist and not self.match_hostname(hostname, whitelist):
-                                return False
-                            return True
-                        elif action == "allow":
-                            # Для allow: запрещаем если домен в черном списке
-                            if blacklist and self.match_hostname(hostname, blacklist):
-                                return False
-                            return True
-                except ValueError:
-                    continue
+        if self.cache_ttl and time.monotonic() - self._checked_at >= self.cache_ttl:
+            self._refresh_domain_lists()
+
+        index = self._find_rule(ipaddress.ip_address(client_ip))
+        if index == -1:
+            # Если не совпало ни одно правило — применяем default_action
+            return self.default_action == "allow"
+
+        action, whitelist, blacklist = self._rules[index]
+        if action == "deny":
+            # Для deny: разрешаем только если домен в белом списке
+            if whitelist is not None and not whitelist.match(os.path.normcase(hostname)):
+                return False
+            return True
 
-        # Если не совпало ни одно правило — применяем default_action
-        return self.default_action == "allow" 
\ No newline at end of file
+        # Для allow: запрещаем если домен в черном списке
+        if blacklist is not None and blacklist.match(os.path.normcase(hostname)):
+            return False
+        return True
@@ -1,23 +1,23 @@
-from typing import Dict, Tuple, Optional
+from typing import Dict, Iterable, Tuple, Optional
 from urllib.parse import urlsplit
 
 class HTTPUtils:
     @staticmethod
-    def parse_headers(headers_raw: str) -> Dict[str, str]:
+    def parse_headers(header_lines: Iterable[bytes]) -> Dict[str, str]:
         """
         Парсинг HTTP заголовков
         
         Args:
-            headers_raw: Сырые заголовки в виде строки
+            header_lines: Строки заголовков в виде bytes (без первой строки запроса)
             
         Returns:
             Dict[str, str]: Словарь заголовков
         """
-        headers = {}
-        for line in headers_raw.split('\r\n'):
-            if ':' in line:
-                k, v = line.split(':', 1)
-                headers[k.strip()] = v.strip()
+        headers: Dict[str, str] = {}
+        for line in header_lines:
+            if b':' in line:
+                k, v = line.split(b':', 1)
+                headers[k.strip().decode(errors='ignore')] = v.strip().decode(errors='ignore')
         return headers
 
     @staticmethod
@@ -38,7 +38,7 @@ class HTTPUtils:
             raise ValueError(f"Invalid request line: {request_line}")
 
     @staticmethod
-    def parse_url(url: str) -> Tuple[str, int, str, str]:
+    def parse_url(url: str) -> Tuple[Optional[str], int, str, str]:
         """
         Парсинг URL
         
@@ -46,7 +46,7 @@ class HTTPUtils:
             url: URL для парсинга
             
         Returns:
-            Tuple[str, int, str, str]: Хост, порт, путь и query
+            Tuple[Optional[str], int, str, str]: Хост (None если не указан), порт, путь и query
         """
         parsed = urlsplit(url)
         host = parsed.hostname
@@ -56,6 +56,61 @@ class HTTPUtils:
         
         return host, port, path, query
 
+    @staticmethod
+    def extract_port(host_header: str) -> Optional[int]:
+        """
+        Извлечение порта из заголовка Host
+        
+        Args:
+            host_header: Значение заголовка Host (например, "example.com:8080")
+            
+        Returns:
+            Optional[int]: Порт или None, если он не указан или некорректен
+        """
+        _, sep, port = host_header.rpartition(':')
+        if not sep:
+            return None
+        try:
+            return int(port)
+        except ValueError:
+            return None
+
+    @staticmethod
+    def force_close_head(head: bytes) -> bytes:
+        """
+        Замена hop-by-hop заголовков Connection и Keep-Alive на "Connection: close"
+        
+        Args:
+            head: Строка статуса и заголовки ответа, включая завершающую пустую строку
+            
+        Returns:
+            bytes: Заголовки ответа для клиента, соединение с которым закрывается после ответа
+        """
+        lines = [
+            line for line in head.split(b'\r\n')
+            if line and line.split(b':', 1)[0].strip().lower() not in (b'connection', b'keep-alive')
+        ]
+        lines.append(b'Connection: close')
+        return b'\r\n'.join(lines) + b'\r\n\r\n'
+
+    @staticmethod
+    def format_response_head(status: int, reason: str, headers: Iterable[Tuple[str, str]]) -> bytearray:
+        """
+        Форматирование строки статуса и заголовков HTTP ответа
+        
+        Args:
+            status: Код статуса
+            reason: Текст статуса
+            headers: Пары (имя, значение) заголовков ответа
+            
+        Returns:
+            bytearray: Строка статуса и заголовки, без завершающей пустой строки
+        """
+        head = bytearray(f"HTTP/1.1 {status} {reason}\r\n".encode())
+        for k, v in headers:
+            head += f"{k}: {v}\r\n".encode()
+        return head
+
     @staticmethod
     def format_response(status: int, reason: str, headers: Dict[str, str], body: bytes) -> bytes:
         """
@@ -70,19 +125,15 @@ class HTTPUtils:
         Returns:
             bytes: Отформатированный ответ
         """
-        response = [f"HTTP/1.1 {status} {reason}"]
+        response = HTTPUtils.format_response_head(status, reason, headers.items())
         
-        # Добавляем заголовки
-        for k, v in headers.items():
-            response.append(f"{k}: {v}")
-            
         # Добавляем Content-Length если есть тело
         if body:
-            response.append(f"Content-Length: {len(body)}")
+            response += b"Content-Length: %d\r\n" % len(body)
             
-        # Добавляем пустую строку и тело
-        response.append("")
+        # Добавляем пустую строку и тело без перекодирования
+        response += b"\r\n"
         if body:
-            response.append(body.decode('utf-8', errors='ignore'))
+            response += body
             
-        return "\r\n".join(response).encode('utf-8') 
\ No newline at end of file
+        return bytes(response)
@@ -0,0 +1,137 @@
+import asyncio
+import os
+import socket
+import sys
+from typing import Optional
+
+from .streams import buffered_size, take_buffered
+
+# Передача данных между сокетами через os.splice без копирования в user space (только Linux)
+SPLICE_AVAILABLE = sys.platform.startswith("linux") and hasattr(os, "splice")
+
+# За один вызов splice ядро передает не больше емкости канала (pipe), по умолчанию 64 KB
+SPLICE_CHUNK = 1 << 16
+
+
+async def _wait_fd(loop: asyncio.AbstractEventLoop, fd: int, writable: bool) -> None:
+    """Ожидание готовности дескриптора к чтению или записи"""
+    fut = loop.create_future()
+
+    def _ready() -> None:
+        if not fut.done():
+            fut.set_result(None)
+
+    if writable:
+        loop.add_writer(fd, _ready)
+    else:
+        loop.add_reader(fd, _ready)
+    try:
+        await fut
+    finally:
+        if writable:
+            loop.remove_writer(fd)
+        else:
+            loop.remove_reader(fd)
+
+
+async def _pump(loop: asyncio.AbstractEventLoop, src: socket.socket, dst: socket.socket) -> None:
+    """Перекачка данных из src в dst через промежуточный pipe до EOF или ошибки"""
+    flags = os.SPLICE_F_MOVE | os.SPLICE_F_NONBLOCK
+    pipe_r, pipe_w = os.pipe2(os.O_NONBLOCK | os.O_CLOEXEC)
+    src_fd, dst_fd = src.fileno(), dst.fileno()
+    try:
+        while True:
+            try:
+                pending = os.splice(src_fd, pipe_w, SPLICE_CHUNK, flags=flags)
+            except BlockingIOError:
+                await _wait_fd(loop, src_fd, writable=False)
+                continue
+            if not pending:
+                break
+            while pending:
+                try:
+                    pending -= os.splice(pipe_r, dst_fd, pending, flags=flags)
+                except BlockingIOError:
+                    await _wait_fd(loop, dst_fd, writable=True)
+    except OSError:
+        pass
+    finally:
+        os.close(pipe_r)
+        os.close(pipe_w)
+        # Как и при закрытии writer в обычном туннеле, завершаем соединение целиком,
+        # чтобы встречное направление тоже получило EOF
+        try:
+            dst.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+
+def _dup_socket(writer: asyncio.StreamWriter) -> Optional[socket.socket]:
+    """Дубликат сокета транспорта, с которым можно работать в обход asyncio"""
+    sock = writer.get_extra_info("socket")
+    if sock is None:
+        return None
+    dup = socket.socket(fileno=os.dup(sock.fileno()))
+    dup.setblocking(False)
+    return dup
+
+
+async def _flush(writer: asyncio.StreamWriter) -> None:
+    """Ожидание полной отправки буфера транспорта"""
+    writer.transport.set_write_buffer_limits(0)
+    await writer.drain()
+
+
+async def splice_tunnel(client_reader: asyncio.StreamReader, client_writer: asyncio.StreamWriter,
+                        remote_reader: asyncio.StreamReader, remote_writer: asyncio.StreamWriter) -> bool:
+    """
+    Двунаправленный туннель между клиентом и сервером через os.splice
+
+    Args:
+        client_reader: StreamReader клиента
+        client_writer: StreamWriter клиента
+        remote_reader: StreamReader сервера
+        remote_writer: StreamWriter сервера
+
+    Returns:
+        bool: False если zero-copy туннель недоступен и нужно использовать обычный
+    """
+    if not SPLICE_AVAILABLE:
+        return False
+    # Без доступа к буферу StreamReader уже прочитанные данные потерялись бы при переключении
+    if buffered_size(client_reader) is None or buffered_size(remote_reader) is None:
+        return False
+
+    client_sock = _dup_socket(client_writer)
+    if client_sock is None:
+        return False
+    remote_sock = _dup_socket(remote_writer)
+    if remote_sock is None:
+        client_sock.close()
+        return False
+
+    loop = asyncio.get_running_loop()
+    try:
+        # Останавливаем чтение транспортами и дожидаемся отправки уже записанных данных,
+        # после этого сокетами владеет только туннель
+        client_writer.transport.pause_reading()
+        remote_writer.transport.pause_reading()
+        await _flush(client_writer)
+        await _flush(remote_writer)
+
+        # Передаем то, что StreamReader успел прочитать до переключения
+        for reader, dst in ((client_reader, remote_sock), (remote_reader, client_sock)):
+            buffered = take_buffered(reader)
+            if buffered:
+                await loop.sock_sendall(dst, buffered)
+
+        await asyncio.gather(
+            _pump(loop, client_sock, remote_sock),
+            _pump(loop, remote_sock, client_sock)
+        )
+    except OSError:
+        pass
+    finally:
+        client_sock.close()
+        remote_sock.close()
+    return True
@@ -0,0 +1,40 @@
+import asyncio
+from typing import Optional
+
+# Публичного API для доступа к уже прочитанным StreamReader данным нет, поэтому функции ниже
+# опираются на внутренний атрибут _buffer (bytearray) в CPython и uvloop. Если его нет,
+# они сообщают об этом, и вызывающий код выбирает безопасный вариант.
+
+
+def buffered_size(reader: asyncio.StreamReader) -> Optional[int]:
+    """
+    Объем данных, прочитанных из сокета, но еще не полученных через StreamReader
+
+    Args:
+        reader: StreamReader соединения
+
+    Returns:
+        Optional[int]: Число байт в буфере или None, если буфер недоступен
+    """
+    buffer = getattr(reader, "_buffer", None)
+    if not isinstance(buffer, bytearray):
+        return None
+    return len(buffer)
+
+
+def take_buffered(reader: asyncio.StreamReader) -> bytes:
+    """
+    Извлечение данных, прочитанных из сокета, но еще не полученных через StreamReader
+
+    Args:
+        reader: StreamReader соединения, чтение которого уже приостановлено
+
+    Returns:
+        bytes: Извлеченные данные; буфер StreamReader после вызова пуст
+    """
+    buffer = getattr(reader, "_buffer", None)
+    if not isinstance(buffer, bytearray):
+        return b""
+    data = bytes(buffer)
+    buffer.clear()
+    return data